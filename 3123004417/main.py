@@ -1,28 +1,53 @@
 import sys
 import os
 import re
-import jieba
 import math
+from collections import Counter
+from functools import lru_cache
 
 # 停用词表（仅过滤无意义虚词）
-STOPWORDS = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', 
-             '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', 
-             '没有', '看', '好', '自己', '这', '那', '他', '她', '它', '们', '来', '去'}
+STOPWORDS = frozenset({'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', 
+                       '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', 
+                       '没有', '看', '好', '自己', '这', '那', '他', '她', '它', '们', '来', '去'})
+
+# 特殊字符清洗正则（保留中文、英文、数字和空格），模块加载时编译一次
+_CLEAN_RE = re.compile(r'[^\u4e00-\u9fa5a-zA-Z0-9\s]')
+
+# jieba分词函数，首次分词时才导入并加载词典（见_load_jieba）
+_jieba_cut = None
 
 def read_file(file_path):
     """读取文件内容，空文件返回空字符串，错误返回None"""
     try:
-        if os.path.isdir(file_path):
-            print(f"错误：{file_path} 是目录，不是文件")
-            return None
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            return content  # 空文件返回空字符串（不抛异常）
+        # 直接用os.read读入全部字节再解码，省去文本IO包装层的开销
+        # （Windows下需O_BINARY，否则会按文本模式转换换行）
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            # st_size只作为首次读取大小的提示：普通文件一次即可读完；
+            # 管道、procfs等文件的st_size为0，单次read也可能读不全，
+            # 因此之后按64KB循环读取直到返回空字节串（不再按文件大小分配缓冲区）
+            chunk_size = max(os.fstat(fd).st_size, 65536)
+            chunks = []
+            while True:
+                chunk = os.read(fd, chunk_size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                chunk_size = 65536
+        finally:
+            os.close(fd)
+        text = b''.join(chunks).decode('utf-8')
+        # 与文本模式读取一致，统一将\r\n和\r换行转换为\n
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text.strip()  # 空文件返回空字符串（不抛异常）
     
     except FileNotFoundError:
         print(f"错误：文件 {file_path} 不存在")
         return None
+    except IsADirectoryError:
+        # 注意：Windows下打开目录抛出的是PermissionError，会走下面的权限错误提示
+        print(f"错误：{file_path} 是目录，不是文件")
+        return None
     except PermissionError:
         print(f"错误：没有读取 {file_path} 的权限")
         return None
@@ -44,74 +69,131 @@ def write_result(result_path, similarity):
         return False
 
 
+def _load_jieba():
+    """延迟导入jieba并加载词典，参数错误、文件缺失等提前退出的情况无需承担加载开销"""
+    global _jieba_cut
+    if _jieba_cut is None:
+        import jieba
+        jieba.initialize()
+        _jieba_cut = jieba.cut
+    return _jieba_cut
+
+
 def preprocess_text(text):
     """文本清洗+分词+停用词过滤"""
+    return list(_preprocess_cached(text))
+
+
+@lru_cache(maxsize=256)
+def _preprocess_cached(text):
+    """preprocess_text的缓存实现，返回不可变元组，相同文本只分词一次"""
     if not text:
-        return []
+        return ()
     
+    # 先统一换行再清洗：文本中不再有\r，清洗后也不可能拼出jieba会整体输出的"\r\n"
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
     # 清洗特殊字符（保留中文、英文、数字和空格）
-    text_clean = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s]', '', text)
-    # 分词（使用精确模式）
-    words = jieba.cut(text_clean, cut_all=False)
-    # 过滤停用词和短词
-    filtered_words = [
-        word for word in words 
-        if word.strip() and word not in STOPWORDS and len(word) > 1
-    ]
-    return filtered_words
+    # 注意：必须先整体删除符号再分词，符号两侧的文字会拼接后一起参与分词
+    # （如"特殊$符号"得到"特殊符号"）；按符号切块后分别分词会改变分词结果
+    text_clean = _CLEAN_RE.sub('', text)
+    # 分词（使用精确模式）并过滤停用词和短词，直接消费生成器不生成中间列表
+    # 换行统一后jieba输出的空白词都是单个字符，长度判断即可将其过滤
+    cut = _load_jieba()
+    stopwords = STOPWORDS  # 绑定为局部名，避免每个词都查找全局变量
+    return tuple(
+        word for word in cut(text_clean, cut_all=False)
+        if len(word) > 1 and word not in stopwords
+    )
 
 
 def get_word_frequency(words):
-    """计算词频"""
-    freq = {}
-    for word in words:
-        freq[word] = freq.get(word, 0) + 1
-    return freq
-
-
-def cosine_similarity(freq1, freq2):
-    """计算余弦相似度"""
-    # 获取所有独特词汇
-    all_words = set(freq1.keys()).union(set(freq2.keys()))
-    if not all_words:
-        return 0.0
-    
-    # 计算点积和模长
-    dot_product = 0
-    norm1 = 0
-    norm2 = 0
-    
-    for word in all_words:
-        count1 = freq1.get(word, 0)
-        count2 = freq2.get(word, 0)
-        dot_product += count1 * count2
-        norm1 += count1 **2
-        norm2 += count2** 2
+    """计算词频（Counter为dict子类，计数循环由C实现）"""
+    return Counter(words)
+
+
+def get_word_frequency_with_norm(words):
+    """计算词频及词频向量的模长"""
+    freq = get_word_frequency(words)
+    return freq, math.sqrt(sum(count * count for count in freq.values()))
+
+
+@lru_cache(maxsize=256)
+def _word_frequency_cached(words):
+    """按分词结果元组缓存词频和模长，返回的Counter仅供内部只读使用"""
+    return get_word_frequency_with_norm(words)
+
+
+def cosine_similarity(freq1, freq2, norm1=None, norm2=None):
+    """计算余弦相似度，可传入预先算好的模长"""
+    # 计算分母：已知模长时直接相乘，否则由模长的平方相乘后只开一次方
+    if norm1 is not None and norm2 is not None:
+        denominator = norm1 * norm2
+    else:
+        square1 = sum(count * count for count in freq1.values())
+        square2 = sum(count * count for count in freq2.values())
+        denominator = math.sqrt(square1 * square2)
     
-    # 避免除以0
-    if norm1 == 0 or norm2 == 0:
+    # 避免除以0（任一文本为空时无需再计算点积）
+    if denominator == 0:
         return 0.0
-    return dot_product / (math.sqrt(norm1) * math.sqrt(norm2))
+    
+    # 点积只需遍历较小的词频表，在较大的表中查找（只在一侧出现的词贡献为0）
+    small, large = (freq1, freq2) if len(freq1) <= len(freq2) else (freq2, freq1)
+    dot_product = sum(count * large.get(word, 0) for word, count in small.items())
+    return dot_product / denominator
 
 
 def calculate_similarity(orig_text, copy_text):
     """计算文本相似度"""
     try:
-        # 预处理文本
-        orig_words = preprocess_text(orig_text)
-        copy_words = preprocess_text(copy_text)
+        # 预处理文本（带缓存，重复文本不再重新分词）
+        orig_words = _preprocess_cached(orig_text)
+        copy_words = _preprocess_cached(copy_text)
         
-        # 计算词频
-        orig_freq = get_word_frequency(orig_words)
-        copy_freq = get_word_frequency(copy_words)
+        # 计算词频及模长
+        orig_freq, orig_norm = _word_frequency_cached(orig_words)
+        copy_freq, copy_norm = _word_frequency_cached(copy_words)
         
-        # 计算余弦相似度
-        return cosine_similarity(orig_freq, copy_freq)
+        # 计算余弦相似度，与calculate_similarity_matrix一致地截断到[0, 1]
+        # （浮点误差可能使相同文本得到1.0000000000000002）
+        similarity = cosine_similarity(orig_freq, copy_freq, orig_norm, copy_norm)
+        return max(0.0, min(1.0, similarity))
     except Exception as e:
         print(f"计算相似度时出错：{str(e)}")
         return 0.0
 
 
+def calculate_similarity_matrix(texts):
+    """批量计算多篇文本两两之间的相似度，返回n×n矩阵"""
+    # 仅批量计算需要numpy/scipy，延迟导入
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    
+    try:
+        # 预处理文本并计算词频及模长（与calculate_similarity共用缓存）
+        freqs = [_word_frequency_cached(_preprocess_cached(text)) for text in texts]
+        
+        # 构建共享词表，按模长归一化后的词频填入稀疏的文档-词矩阵
+        # （稠密矩阵的内存为文本数×总词表大小，文本多时不可接受）
+        vocab = {}
+        rows, cols, values = [], [], []
+        for row, (freq, norm) in enumerate(freqs):
+            if norm == 0:
+                continue  # 空文本保持全零行，相似度为0
+            for word, count in freq.items():
+                rows.append(row)
+                cols.append(vocab.setdefault(word, len(vocab)))
+                values.append(count / norm)
+        matrix = csr_matrix((values, (rows, cols)), shape=(len(texts), len(vocab)))
+        
+        # 行向量已单位化，一次稀疏矩阵乘法即得所有文本对的余弦相似度
+        # 与calculate_similarity一致地截断到[0, 1]，消除浮点误差造成的越界
+        return np.clip((matrix @ matrix.T).toarray(), 0.0, 1.0)
+    except Exception as e:
+        print(f"计算相似度矩阵时出错：{str(e)}")
+        return np.zeros((len(texts), len(texts)))
+
+
 def main():
     """主函数：处理命令行参数并执行查重流程"""
     # 校验命令行参数
@@ -2,10 +2,14 @@ import unittest
 import os
 import tempfile
 import sys
+import threading
+import io
+from contextlib import redirect_stdout
 from main import (
     read_file, write_result, preprocess_text,
-    get_word_frequency, cosine_similarity,
-    calculate_similarity, main
+    get_word_frequency, get_word_frequency_with_norm, cosine_similarity,
+    calculate_similarity, calculate_similarity_matrix, main,
+    _load_jieba
 )
 
 class TestPaperChecker(unittest.TestCase):
@@ -24,27 +28,40 @@ class TestPaperChecker(unittest.TestCase):
         ("这个电影非常好看", "这部影片十分精彩", 0.00)
     ]
     
-    def setUp(self):
-        """测试前准备：创建临时文件"""
+    @classmethod
+    def setUpClass(cls):
+        """测试前准备：创建所有测试共用的只读输入文件，并预先加载jieba词典"""
         # 创建临时原文文件
-        self.orig_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, encoding='utf-8')
-        self.orig_file.write("测试原文内容")
-        self.orig_file.close()
+        cls.orig_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, encoding='utf-8')
+        cls.orig_file.write("测试原文内容")
+        cls.orig_file.close()
         
         # 创建临时抄袭文件
-        self.copy_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, encoding='utf-8')
-        self.copy_file.write("测试抄袭内容")
-        self.copy_file.close()
+        cls.copy_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, encoding='utf-8')
+        cls.copy_file.write("测试抄袭内容")
+        cls.copy_file.close()
         
-        # 创建临时结果文件
+        # 词典只加载一次，不计入首个用到分词的测试
+        _load_jieba()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """测试后清理：删除共用的临时文件"""
+        for file in [cls.orig_file.name, cls.copy_file.name]:
+            if os.path.exists(file):
+                os.unlink(file)
+    
+    def setUp(self):
+        """每个测试使用独立的结果文件路径，且测试开始时文件不存在，
+        避免其他测试写入的内容让结果文件相关的断言误通过"""
         self.result_file = tempfile.NamedTemporaryFile(mode='w+', delete=False, encoding='utf-8')
         self.result_file.close()
+        os.unlink(self.result_file.name)
     
     def tearDown(self):
-        """测试后清理：删除临时文件"""
-        for file in [self.orig_file.name, self.copy_file.name, self.result_file.name]:
-            if os.path.exists(file):
-                os.unlink(file)
+        """测试后清理：删除结果文件"""
+        if os.path.exists(self.result_file.name):
+            os.unlink(self.result_file.name)
     
     # 测试文件读取功能
     def test_read_file_normal(self):
@@ -60,6 +77,33 @@ class TestPaperChecker(unittest.TestCase):
         self.assertEqual(content, "")  # 空文件返回空字符串
         os.unlink(empty_file.name)
     
+    def test_read_file_crlf(self):
+        """测试Windows/旧Mac换行与文本模式读取一样统一为\\n"""
+        crlf_file = tempfile.NamedTemporaryFile(mode='wb', delete=False)
+        crlf_file.write("第一行\r\n第二行\r第三行\r\n".encode('utf-8'))
+        crlf_file.close()
+        content = read_file(crlf_file.name)
+        self.assertEqual(content, "第一行\n第二行\n第三行")
+        os.unlink(crlf_file.name)
+    
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), "当前平台不支持命名管道")
+    def test_read_file_fifo(self):
+        """测试读取命名管道（st_size为0）时能读到全部内容"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            fifo_path = os.path.join(temp_dir, "fifo")
+            os.mkfifo(fifo_path)
+            text = "测试管道内容" * 20000  # 超过管道缓冲区，需多次读取
+            
+            def writer():
+                with open(fifo_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            
+            thread = threading.Thread(target=writer)
+            thread.start()
+            content = read_file(fifo_path)
+            thread.join()
+            self.assertEqual(content, text)
+    
     def test_read_file_not_exists(self):
         """测试读取不存在的文件"""
         content = read_file("non_existent_file_123.txt")
@@ -71,6 +115,15 @@ class TestPaperChecker(unittest.TestCase):
             content = read_file(temp_dir)
             self.assertIsNone(content)
     
+    def test_read_file_directory(self):
+        """测试读取目录返回None并提示是目录（Windows下为权限错误提示）"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            content = read_file(tempfile.gettempdir())
+        self.assertIsNone(content)
+        if os.name != 'nt':
+            self.assertIn("是目录，不是文件", output.getvalue())
+    
     # 测试文本预处理功能
     def test_preprocess_text_basic(self):
         """测试文本预处理基础功能"""
@@ -95,6 +148,22 @@ class TestPaperChecker(unittest.TestCase):
         words = preprocess_text(text)
         self.assertEqual(words, ["文本", "包含", "特殊符号"])
     
+    def test_preprocess_text_whitespace(self):
+        """测试空白字符（含Windows换行）不会作为词输出"""
+        for text in ["天气\r\n\r\n电影 \t 晴朗",
+                     "天气\r\r\n电影\r\r\n晴朗",
+                     "天气\r。\n电影\r\n。晴朗"]:
+            with self.subTest(text=text):
+                self.assertEqual(preprocess_text(text), ["天气", "电影", "晴朗"])
+    
+    def test_preprocess_text_cached_result_isolated(self):
+        """测试缓存结果不受调用方修改影响"""
+        text = "今天天气晴朗，适合看电影"
+        words = preprocess_text(text)
+        expected = list(words)
+        words.clear()
+        self.assertEqual(preprocess_text(text), expected)
+    
     # 测试词频计算功能
     def test_get_word_frequency(self):
         """测试词频计算"""
@@ -104,6 +173,12 @@ class TestPaperChecker(unittest.TestCase):
         self.assertEqual(freq["电影"], 1)
         self.assertEqual(freq["特殊"], 1)
     
+    def test_get_word_frequency_with_norm(self):
+        """测试词频及模长计算"""
+        freq, norm = get_word_frequency_with_norm(["天气", "天气", "电影"])
+        self.assertEqual(freq["天气"], 2)
+        self.assertAlmostEqual(norm, 5 ** 0.5)
+    
     # 测试相似度计算功能
     def test_cosine_similarity_identical(self):
         """测试完全相同的文本相似度"""
@@ -126,6 +201,16 @@ class TestPaperChecker(unittest.TestCase):
         similarity = cosine_similarity(freq1, freq2)
         self.assertAlmostEqual(similarity, 0.57, delta=0.01)
     
+    def test_cosine_similarity_with_norms(self):
+        """测试传入预先计算的模长与直接计算结果一致"""
+        freq1, norm1 = get_word_frequency_with_norm(["天气", "天气", "电影", "晴朗"])
+        freq2, norm2 = get_word_frequency_with_norm(["天气", "电影", "电影"])
+        self.assertAlmostEqual(
+            cosine_similarity(freq1, freq2, norm1, norm2),
+            cosine_similarity(freq1, freq2)
+        )
+        self.assertEqual(cosine_similarity({}, freq2, 0.0, norm2), 0.0)
+    
     def test_calculate_similarity_all_cases(self):
         """测试所有预设的相似度计算用例"""
         for orig, copy, expected in self.TEST_CASES:
@@ -133,6 +218,28 @@ class TestPaperChecker(unittest.TestCase):
                 similarity = calculate_similarity(orig, copy)
                 self.assertAlmostEqual(similarity, expected, delta=0.02)
     
+    def test_calculate_similarity_clamped(self):
+        """测试相似度被截断到[0, 1]，相同文本不会因浮点误差超过1"""
+        text = "测试文本完全一致"
+        self.assertLessEqual(calculate_similarity(text, text), 1.0)
+    
+    def test_calculate_similarity_matrix(self):
+        """测试批量相似度矩阵与逐对计算结果一致"""
+        texts = [orig for orig, _, _ in self.TEST_CASES] + [""]
+        matrix = calculate_similarity_matrix(texts)
+        self.assertEqual(matrix.shape, (len(texts), len(texts)))
+        for i, text1 in enumerate(texts):
+            for j, text2 in enumerate(texts):
+                with self.subTest(i=i, j=j):
+                    self.assertAlmostEqual(
+                        matrix[i, j], calculate_similarity(text1, text2), delta=1e-9
+                    )
+        self.assertTrue(((matrix >= 0.0) & (matrix <= 1.0)).all())
+        # 非空文本与自身的相似度为1（浮点误差下不保证严格相等）
+        for i, value in enumerate(matrix.diagonal()[:-1]):
+            with self.subTest(diagonal=i):
+                self.assertAlmostEqual(value, 1.0, delta=1e-9)
+    
     # 测试结果写入功能
     def test_write_result_normal(self):
         """测试正常写入结果"""